@@ -1,16 +1,44 @@
+import atexit
+import socket
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Protocol
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from influxdb import InfluxDBClient
 from influxdb_client import InfluxDBClient as InfluxDBClientV2
+from influxdb_client import WritePrecision
 from influxdb_client.client.write_api import SYNCHRONOUS
 from loguru import logger
 
 from influx_mcp.config import Settings, settings
 from influx_mcp.schemas import BucketInfo
 
+# Shared session for version auto-detection and health probes. Both probes hit
+# the same host, so they reuse a single keep-alive connection.
+_probe_session = requests.Session()
+_probe_adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4)
+_probe_session.mount("http://", _probe_adapter)
+_probe_session.mount("https://", _probe_adapter)
+_PROBE_TIMEOUT_SEC = 5
+# Overall wait for both probes. requests applies the probe timeout to the
+# connect and the read separately, so a slow but healthy v2 probe can take up
+# to twice as long; the budget must outlast it or v2 gets misdetected as v1.
+_DETECT_TIMEOUT_SEC = 2 * _PROBE_TIMEOUT_SEC + 1
+
+# Connection pool tuning for the query/write clients. Schema introspection
+# issues bursts of small queries, so allow plenty of parallel keep-alive
+# connections to the same host.
+_POOL_MAXSIZE = 64
+_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
 
 class InfluxClient(Protocol):
     """
@@ -31,6 +59,14 @@ class InfluxClient(Protocol):
         """Execute a read-only query."""
         ...
 
+    def query_csv(self, query_string: str, **kwargs) -> Iterator[List[str]]:
+        """Execute a read-only Flux query and stream annotated CSV rows (v2 only)."""
+        ...
+
+    def query_data_frame(self, query_string: str, **kwargs) -> Any:
+        """Execute a read-only Flux query into a pandas DataFrame (v2 only, requires pandas)."""
+        ...
+
     def write(self, *args, **kwargs) -> bool:
         """Write data points."""
         ...
@@ -46,12 +82,20 @@ class InfluxDBV1ClientImpl(InfluxClient):
 
     def __init__(self, settings: Settings):
         logger.info("Initializing InfluxDB v1 client...")
+        url = settings.influx_url_parts
+        use_ssl = url.scheme == "https"
+        host = url.hostname or "localhost"
         self.client = InfluxDBClient(
-            host=settings.influx_url.split(":")[0].replace("http://", ""),
-            port=int(settings.influx_url.split(":")[2]) if len(settings.influx_url.split(":")) > 2 else 8086,
+            host=f"[{host}]" if ":" in host else host, # IPv6 literal
+            port=url.port or (443 if use_ssl else 8086),
+            ssl=use_ssl,
+            verify_ssl=use_ssl,
             username=settings.influx_username,
-            password=settings.get_influx_password(),
+            password=settings.influx_password_str,
             timeout=settings.influx_request_timeout_sec,
+            pool_size=_POOL_MAXSIZE,
+            socket_options=_SOCKET_OPTIONS,
+            gzip=True,
         )
 
     def ping(self) -> bool:
@@ -80,6 +124,7 @@ class InfluxDBV1ClientImpl(InfluxClient):
         return self.client.query(query_string, database=db)
 
     def write(self, *args, **kwargs) -> bool:
+        kwargs.setdefault("batch_size", 5000)
         return self.client.write_points(*args, **kwargs)
 
     def close(self) -> None:
@@ -92,14 +137,22 @@ class InfluxDBV2ClientImpl(InfluxClient):
 
     def __init__(self, settings: Settings):
         logger.info("Initializing InfluxDB v2 client...")
+        self._org = settings.influx_org
         self.client = InfluxDBClientV2(
             url=settings.influx_url,
-            token=settings.get_influx_token(),
-            org=settings.influx_org,
+            token=settings.influx_token_str,
+            org=self._org,
             timeout=settings.influx_request_timeout_sec * 1000, # ms
+            enable_gzip=True,
+            connection_pool_maxsize=_POOL_MAXSIZE,
+            retries=Retry(total=3, backoff_factor=0.1),
         )
         self.query_api = self.client.query_api()
+        # Writes are synchronous so the write tools only report points the
+        # server has accepted. Batching happens per call instead: write_points
+        # sends all points for a bucket in one request.
         self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+        self._write_precision = getattr(WritePrecision, settings.influx_write_precision.upper())
 
     def ping(self) -> bool:
         try:
@@ -114,20 +167,80 @@ class InfluxDBV2ClientImpl(InfluxClient):
 
     def list_buckets_or_dbs(self) -> List[BucketInfo]:
         buckets_api = self.client.buckets_api()
-        buckets = buckets_api.find_buckets().buckets
-        return [BucketInfo(name=b.name, type="bucket") for b in buckets]
+        # find_buckets_iter pages transparently, so no page of buckets is
+        # materialized up front (find_buckets() also stops at the first 20).
+        return [
+            BucketInfo.model_construct(name=b.name, type="bucket")
+            for b in buckets_api.find_buckets_iter(limit=100)
+        ]
 
     def query(self, query_string: str, **kwargs) -> Any:
-        return self.query_api.query(query_string, org=settings.influx_org)
+        return self.query_api.query(query_string, org=self._org)
+
+    def query_csv(self, query_string: str, **kwargs) -> Iterator[List[str]]:
+        return self.query_api.query_csv(query_string, org=self._org)
+
+    def query_data_frame(self, query_string: str, **kwargs) -> Any:
+        return self.query_api.query_data_frame(query_string, org=self._org)
 
     def write(self, *args, **kwargs) -> bool:
+        kwargs.setdefault("write_precision", self._write_precision)
         self.write_api.write(*args, **kwargs)
         return True
 
     def close(self) -> None:
+        self.write_api.close()
         self.client.close()
 
 
+def _probe_v2(base_url: str) -> Tuple[Optional[str], bool]:
+    """Probes the v2 /api/v2/ready endpoint."""
+    try:
+        response = _probe_session.get(f"{base_url}/api/v2/ready", timeout=_PROBE_TIMEOUT_SEC)
+        if response.status_code == 200:
+            logger.info("Detected InfluxDB v2 via /api/v2/ready endpoint.")
+            return "v2", True
+    except requests.RequestException:
+        logger.warning("Could not connect to v2 /api/v2/ready endpoint.")
+    return None, False
+
+
+def _probe_v1(base_url: str) -> Tuple[Optional[str], bool]:
+    """Probes the v1 /ping endpoint."""
+    try:
+        response = _probe_session.get(f"{base_url}/ping", timeout=_PROBE_TIMEOUT_SEC)
+        # v1 ping returns 204 No Content on success
+        if response.status_code == 204:
+            logger.info("Detected InfluxDB v1 via /ping endpoint.")
+            return "v1", True
+    except requests.RequestException:
+        logger.warning("Could not connect to v1 /ping endpoint.")
+    return None, False
+
+
+def _detect_version(base_url: str) -> Optional[str]:
+    """
+    Runs the v2 and v1 probes concurrently and returns "2", "1" or None.
+    v2 takes precedence: v2 servers also answer /ping with 204, so a v1 hit
+    only wins once the v2 probe has failed or timed out.
+    """
+    executor = ThreadPoolExecutor(max_workers=2)
+    futures = [executor.submit(_probe_v2, base_url), executor.submit(_probe_v1, base_url)]
+    v1_detected = False
+    try:
+        for future in as_completed(futures, timeout=_DETECT_TIMEOUT_SEC):
+            kind, ok = future.result()
+            if ok and kind == "v2":
+                return "2"
+            if ok and kind == "v1":
+                v1_detected = True
+    except FuturesTimeoutError:
+        logger.warning("Timed out waiting for InfluxDB version probes.")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return "1" if v1_detected else None
+
+
 def get_influx_client(settings: Settings) -> InfluxClient:
     """
     Factory function to get the appropriate InfluxDB client based on settings
@@ -144,26 +257,11 @@ def get_influx_client(settings: Settings) -> InfluxClient:
     # Auto-detection logic
     if version == "auto":
         logger.info("Auto-detecting InfluxDB version...")
-        # Try v2 first
-        try:
-            v2_ready_url = f"{settings.influx_url}/api/v2/ready"
-            response = requests.get(v2_ready_url, timeout=5)
-            if response.status_code == 200:
-                logger.info("Detected InfluxDB v2 via /api/v2/ready endpoint.")
-                return InfluxDBV2ClientImpl(settings)
-        except requests.RequestException:
-            logger.warning("Could not connect to v2 /api/v2/ready endpoint. Trying v1.")
-
-        # Try v1 next
-        try:
-            v1_ping_url = f"{settings.influx_url}/ping"
-            response = requests.get(v1_ping_url, timeout=5)
-            # v1 ping returns 204 No Content on success
-            if response.status_code == 204:
-                logger.info("Detected InfluxDB v1 via /ping endpoint.")
-                return InfluxDBV1ClientImpl(settings)
-        except requests.RequestException:
-             logger.warning("Could not connect to v1 /ping endpoint.")
+        detected = _detect_version(settings.influx_url)
+        if detected == "2":
+            return InfluxDBV2ClientImpl(settings)
+        if detected == "1":
+            return InfluxDBV1ClientImpl(settings)
 
     raise ConnectionError("Could not auto-detect InfluxDB version. Please specify INFLUX_VERSION=1 or INFLUX_VERSION=2.")
 
@@ -172,13 +270,18 @@ def get_influx_client(settings: Settings) -> InfluxClient:
 try:
     influx_client = get_influx_client(settings)
     logger.info(f"Successfully created InfluxDB client for version {influx_client.version}")
+    atexit.register(influx_client.close)
 except (ConnectionError, Exception) as e:
     logger.error(f"Failed to initialize InfluxDB client: {e}")
-    # To allow app to start and return errors, we can use a dummy client
-    class DummyClient(InfluxClient):
+    # To allow app to start and return errors, we can use a dummy client.
+    # It deliberately doesn't inherit the InfluxClient stubs, so every client
+    # method (ping, query, ...) lands in __getattr__ and raises right away.
+    class DummyClient:
         version = "none"
+        _error_message = f"InfluxDB client not initialized: {e}"
+
         def __getattr__(self, name):
-            def method(*args, **kwargs):
-                raise ConnectionError(f"InfluxDB client not initialized: {e}")
-            return method
+            if name.startswith("__"):
+                raise AttributeError(name)
+            raise ConnectionError(self._error_message)
     influx_client = DummyClient()
@@ -1,6 +1,8 @@
 import logging
 import sys
+from functools import cached_property
 from typing import Literal, Optional
+from urllib.parse import ParseResult, urlparse
 
 from pydantic import Field, SecretStr, ValidationError
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -16,6 +18,8 @@ class Settings(BaseSettings):
     """
     # MCP Settings
     mcp_log_level: str = Field("INFO", alias="MCP_LOG_LEVEL")
+    mcp_meta_cache_ttl: float = Field(60, alias="MCP_META_CACHE_TTL")
+    mcp_max_workers: int = Field(40, gt=0, alias="MCP_MAX_WORKERS")
 
     # InfluxDB General Settings
     influx_version: Literal["auto", "1", "2"] = Field("auto", alias="INFLUX_VERSION")
@@ -26,6 +30,7 @@ class Settings(BaseSettings):
     influx_org: Optional[str] = Field(None, alias="INFLUX_ORG")
     influx_token: Optional[SecretStr] = Field(None, alias="INFLUX_TOKEN")
     influx_default_bucket: Optional[str] = Field(None, alias="INFLUX_DEFAULT_BUCKET")
+    influx_write_precision: Literal["ns", "us", "ms", "s"] = Field("ns", alias="INFLUX_WRITE_PRECISION")
 
     # InfluxDB v1 Specific Settings
     influx_username: Optional[str] = Field(None, alias="INFLUX_USERNAME")
@@ -45,18 +50,33 @@ class Settings(BaseSettings):
         d = mask_sensitive_data(d)
         return f"Settings({d})"
 
-    def get_influx_token(self) -> Optional[str]:
-        """Safely retrieves the string value of the Influx token."""
+    @cached_property
+    def influx_url_parts(self) -> ParseResult:
+        """The parsed INFLUX_URL, computed once."""
+        return urlparse(self.influx_url)
+
+    @cached_property
+    def influx_token_str(self) -> Optional[str]:
+        """The unwrapped Influx token, computed once."""
         if self.influx_token:
             return self.influx_token.get_secret_value()
         return None
 
-    def get_influx_password(self) -> Optional[str]:
-        """Safely retrieves the string value of the Influx password."""
+    @cached_property
+    def influx_password_str(self) -> Optional[str]:
+        """The unwrapped Influx password, computed once."""
         if self.influx_password:
             return self.influx_password.get_secret_value()
         return None
 
+    def get_influx_token(self) -> Optional[str]:
+        """Safely retrieves the string value of the Influx token."""
+        return self.influx_token_str
+
+    def get_influx_password(self) -> Optional[str]:
+        """Safely retrieves the string value of the Influx password."""
+        return self.influx_password_str
+
 
 # --- Global Settings Instance ---
 
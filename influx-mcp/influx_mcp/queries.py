@@ -1,38 +1,224 @@
-from datetime import datetime
-from typing import Any, Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from string import Template
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple
 
 from loguru import logger
 
-from influx_mcp.client import InfluxClient, influx_client
+from influx_mcp.client import InfluxClient, influx_client, settings
 from influx_mcp.schemas import (BucketInfo, FieldInfo, LastPointResponse,
                                 MeasurementInfo, QueryStats,
                                 QueryTimeseriesResponse, TagInfo,
-                                TimeseriesPoint)
-from influx_mcp.utils import parse_time_range
-
-
-def _parse_target(target: str) -> Tuple[str, str | None]:
+                                TimeseriesColumns, TimeseriesPoint,
+                                WindowStatsResponse)
+from influx_mcp.utils import parse_time_range, ttl_cache
+
+# Upper bound on concurrent per-key tag value queries in list_tags.
+_TAG_VALUES_MAX_WORKERS = 8
+
+# Schema metadata changes rarely, so results are memoized briefly. Tag values
+# grow with cardinality and get a shorter TTL.
+_SCHEMA_CACHE_TTL_SEC = settings.mcp_meta_cache_ttl
+_TAGS_CACHE_TTL_SEC = _SCHEMA_CACHE_TTL_SEC / 2
+
+# --- Flux Templates ---
+# Substituted values must already be Flux literals (see _quote_flux).
+
+_FLUX_MEASUREMENTS = Template('''import "influxdata/influxdb/schema"
+schema.measurements(bucket: $bucket)''')
+
+_FLUX_FIELD_KEYS = Template('''import "influxdata/influxdb/schema"
+schema.measurementFieldKeys(
+    bucket: $bucket,
+    measurement: $measurement,
+    start: -365d
+)''')
+
+# One query for all tag keys and values: take the last point of every series
+# in the last 30 days and collect the tag columns client-side.
+_FLUX_TAG_VALUES = Template('''from(bucket: $bucket)
+  |> range(start: -30d)
+  |> filter(fn: (r) => r["_measurement"] == $measurement)
+  |> last()
+  |> drop(columns: ["_start", "_stop", "_time", "_value"])''')
+
+_FLUX_TIMESERIES = Template('''${imports}from(bucket: $bucket)
+  |> range(start: $start, stop: $stop)
+  |> filter(fn: (r) => r["_measurement"] == $measurement)
+  |> filter(fn: (r) => r["_field"] == $field)
+${tag_filter}${aggregate}  |> limit(n: $limit)
+  |> yield(name: "results")''')
+
+_FLUX_AGGREGATE_WINDOW = Template('''  |> aggregateWindow(every: $every, fn: $fn, createEmpty: $create_empty)
+''')
+
+# All window statistics in one round-trip: each aggregate is a separate yield
+# off the same scan, with series merged so the stats cover the whole window.
+_FLUX_WINDOW_STATS = Template('''data = from(bucket: $bucket)
+  |> range(start: $start, stop: $stop)
+  |> filter(fn: (r) => r["_measurement"] == $measurement)
+  |> filter(fn: (r) => r["_field"] == $field)
+${tag_filter}
+data |> group() |> mean() |> yield(name: "mean")
+data |> group() |> min() |> yield(name: "min")
+data |> group() |> max() |> yield(name: "max")
+data |> last() |> group() |> max(column: "_time") |> yield(name: "last")
+data |> group() |> count() |> yield(name: "count")''')
+
+# Aggregates selected by the v1 window_stats query. Each is aliased to its own
+# name so the single result row maps straight onto WindowStatsResponse fields.
+_WINDOW_STATS_AGGREGATES = ("mean", "min", "max", "last", "count")
+
+_FLUX_FILTER = Template('''  |> filter(fn: (r) => $predicate)
+''')
+
+_FLUX_LAST_POINT = Template('''from(bucket: $bucket)
+  |> range(start: -365d) // Look back up to a year
+  |> filter(fn: (r) => r["_measurement"] == $measurement)
+${field_filter}${tag_filter}  |> last()''')
+
+
+def _quote_flux(value: str) -> str:
+    """Returns `value` as a double-quoted Flux string literal."""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("${", "\\${")
+    return f'"{escaped}"'
+
+
+def _rfc3339(dt: datetime) -> str:
+    """Formats an aware datetime as an RFC 3339 UTC timestamp for Flux and InfluxQL."""
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def _time_iso(dt: datetime) -> str:
+    """
+    Formats a result timestamp the way InfluxDB writes RFC 3339 times: UTC with
+    a 'Z' suffix and trailing zeros trimmed from the fraction. This matches the
+    raw strings of the annotated CSV path. Nanoseconds on pandas Timestamps
+    are kept.
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    dt = dt.astimezone(timezone.utc)
+    nanos = dt.microsecond * 1000 + getattr(dt, "nanosecond", 0)
+    fraction = f".{nanos:09d}".rstrip("0").rstrip(".")
+    return f"{dt:%Y-%m-%dT%H:%M:%S}{fraction}Z"
+
+
+def _flux_tag_predicate(tags: Dict[str, str] | None) -> str:
+    """Builds an escaped Flux predicate matching every tag key/value pair."""
+    if not tags:
+        return ""
+    return " and ".join(f'r[{_quote_flux(k)}] == {_quote_flux(v)}' for k, v in tags.items())
+
+
+def _influxql_ident(name: str) -> str:
+    """Returns `name` as a double-quoted InfluxQL identifier."""
+    escaped = name.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def _influxql_str(value: str) -> str:
+    """Returns `value` as a single-quoted InfluxQL string literal."""
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def _influxql_measurement(db: str, rp: str | None, measurement: str) -> str:
+    """Builds a fully qualified "db"."rp"."measurement" reference."""
+    return ".".join((_influxql_ident(db), _influxql_ident(rp) if rp else "", _influxql_ident(measurement)))
+
+
+def _influxql_tag_predicate(tags: Dict[str, str] | None) -> str:
+    """Builds an escaped InfluxQL predicate matching every tag key/value pair."""
+    if not tags:
+        return ""
+    return " AND ".join(f'{_influxql_ident(k)} = {_influxql_str(v)}' for k, v in tags.items())
+
+
+# Converters for the `#datatype` annotation of the Flux `_value` column.
+_FLUX_CSV_CASTS = {
+    "double": float,
+    "long": int,
+    "unsignedLong": int,
+    "boolean": lambda v: v == "true",
+}
+
+
+def _iter_csv_points(rows: Iterable[List[str]]) -> Iterator[Tuple[str, Any]]:
+    """
+    Yields (time, value) pairs from annotated Flux CSV. Timestamps are kept as
+    the RFC 3339 strings sent by the server, so no datetime round-trip is needed.
+    """
+    datatypes: List[str] = []
+    expect_header = True
+    time_idx = value_idx = error_idx = None
+    cast = str
+    for row in rows:
+        first = row[0]
+        if first.startswith("#"):
+            if first == "#datatype":
+                datatypes = row
+            expect_header = True
+            continue
+        if expect_header:
+            expect_header = False
+            if "error" in row and "_time" not in row:
+                error_idx = row.index("error")
+                continue
+            time_idx, value_idx = row.index("_time"), row.index("_value")
+            cast = _FLUX_CSV_CASTS.get(datatypes[value_idx], str) if datatypes else str
+            continue
+        if error_idx is not None:
+            raise ValueError(f"Flux query failed: {row[error_idx]}")
+        raw = row[value_idx]
+        yield row[time_idx], cast(raw) if raw != "" else None
+
+
+class TargetParts(NamedTuple):
+    db: str
+    rp: str | None = None
+
+
+@lru_cache(maxsize=256)
+def _parse_target(target: str) -> TargetParts:
     """Parses 'db/rp' or 'bucket' into parts."""
-    if "/" in target:
-        db, rp = target.split("/", 1)
-        return db, rp
-    return target, None
+    db, sep, rp = target.partition("/")
+    return TargetParts(db, rp) if sep else TargetParts(db)
+
+def _client_version() -> str:
+    return influx_client.version
 
 # --- Schema Queries ---
 
+# Results are memoized per bucket/database rather than per target string, so
+# 'db' and 'db/rp' share entries and a write to either invalidates both.
+
+def clear_schema_cache() -> None:
+    """Drops all memoized schema query results."""
+    for func in (list_buckets_or_dbs, _list_measurements, _list_fields, _list_tags):
+        func.cache_clear()
+
+def invalidate_schema_cache(target: str, measurement: str) -> None:
+    """Forgets memoized schema results a write to `measurement` may have changed."""
+    bucket_or_db = _parse_target(target).db
+    _list_measurements.cache_pop(bucket_or_db)
+    _list_fields.cache_pop(bucket_or_db, measurement)
+    _list_tags.cache_pop(bucket_or_db, measurement)
+
+@ttl_cache(ttl=_SCHEMA_CACHE_TTL_SEC, scope=_client_version)
 def list_buckets_or_dbs() -> List[BucketInfo]:
     """Uses the client to list buckets or databases."""
     return influx_client.list_buckets_or_dbs()
 
 def list_measurements(target: str) -> List[MeasurementInfo]:
     """Lists all measurements in a given bucket or database."""
-    bucket_or_db, _ = _parse_target(target)
+    return _list_measurements(_parse_target(target).db)
 
+@ttl_cache(ttl=_SCHEMA_CACHE_TTL_SEC, scope=_client_version)
+def _list_measurements(bucket_or_db: str) -> List[MeasurementInfo]:
     if influx_client.version == "2":
-        query = f'''
-        import "influxdata/influxdb/schema"
-        schema.measurements(bucket: "{bucket_or_db}")
-        '''
+        query = _FLUX_MEASUREMENTS.substitute(bucket=_quote_flux(bucket_or_db))
         tables = influx_client.query(query)
         return [MeasurementInfo(name=row.get_value()) for table in tables for row in table.records]
     else: # v1
@@ -42,134 +228,166 @@ def list_measurements(target: str) -> List[MeasurementInfo]:
 
 def list_fields(target: str, measurement: str) -> List[FieldInfo]:
     """Lists all field keys for a given measurement."""
-    bucket_or_db, _ = _parse_target(target)
+    return _list_fields(_parse_target(target).db, measurement)
 
+@ttl_cache(ttl=_SCHEMA_CACHE_TTL_SEC, scope=_client_version)
+def _list_fields(bucket_or_db: str, measurement: str) -> List[FieldInfo]:
     if influx_client.version == "2":
-        query = f'''
-        import "influxdata/influxdb/schema"
-        schema.measurementFieldKeys(
-            bucket: "{bucket_or_db}",
-            measurement: "{measurement}",
-            start: -365d
+        query = _FLUX_FIELD_KEYS.substitute(
+            bucket=_quote_flux(bucket_or_db), measurement=_quote_flux(measurement)
         )
-        '''
         tables = influx_client.query(query)
         # Type information is not easily available in Flux schema queries
         return [FieldInfo(name=row.get_value()) for table in tables for row in table.records]
     else: # v1
-        query = f'SHOW FIELD KEYS FROM "{measurement}"'
+        query = f'SHOW FIELD KEYS FROM {_influxql_ident(measurement)}'
         results = influx_client.query(query, db=bucket_or_db)
         return [FieldInfo(name=item['fieldKey'], type=item.get('fieldType')) for item in results.get_points()]
 
 
+def _tag_values_v1(db: str, measurement: str, key: str) -> List[str]:
+    # This can be slow, InfluxQL doesn't have a great way to limit this
+    query = f'SHOW TAG VALUES FROM {_influxql_ident(measurement)} WITH KEY = {_influxql_ident(key)}'
+    results = influx_client.query(query, db=db)
+    return [item['value'] for item in results.get_points()]
+
+
+def _collect_tag_values(fetch, target: str, measurement: str, keys: List[str]) -> List[TagInfo]:
+    """Runs one tag-value lookup per key concurrently, preserving key order."""
+    if not keys:
+        return []
+    with ThreadPoolExecutor(max_workers=min(_TAG_VALUES_MAX_WORKERS, len(keys))) as executor:
+        all_values = executor.map(lambda key: fetch(target, measurement, key), keys)
+        return [TagInfo(key=key, values=values[:100]) for key, values in zip(keys, all_values)] # Limit values
+
+
 def list_tags(target: str, measurement: str) -> List[TagInfo]:
     """Lists all tag keys and their values for a given measurement."""
-    bucket_or_db, _ = _parse_target(target)
+    return _list_tags(_parse_target(target).db, measurement)
 
+@ttl_cache(ttl=_TAGS_CACHE_TTL_SEC, scope=_client_version)
+def _list_tags(bucket_or_db: str, measurement: str) -> List[TagInfo]:
     if influx_client.version == "2":
-        # This can be slow on large datasets. We limit to last 30 days.
-        query = f'''
-        import "influxdata/influxdb/schema"
-        schema.measurementTagKeys(
-            bucket: "{bucket_or_db}",
-            measurement: "{measurement}",
-            start: -30d
+        query = _FLUX_TAG_VALUES.substitute(
+            bucket=_quote_flux(bucket_or_db), measurement=_quote_flux(measurement)
         )
-        '''
         tables = influx_client.query(query)
-        keys = [row.get_value() for table in tables for row in table.records]
-        tags = []
-        for key in keys:
-            values_query = f'''
-            import "influxdata/influxdb/schema"
-            schema.measurementTagValues(
-                bucket: "{bucket_or_db}",
-                measurement: "{measurement}",
-                tag: "{key}",
-                start: -30d
-            )
-            '''
-            values_tables = influx_client.query(values_query)
-            values = [row.get_value() for table in values_tables for row in table.records]
-            tags.append(TagInfo(key=key, values=values[:100])) # Limit values
-        return tags
+        values_by_key: Dict[str, set] = {}
+        for table in tables:
+            for row in table.records:
+                for key, value in row.values.items():
+                    # Skip Flux system columns (_field, _measurement, ...) and
+                    # the result/table annotations; the rest are tag keys.
+                    if key.startswith("_") or key in ("result", "table") or value is None:
+                        continue
+                    values_by_key.setdefault(key, set()).add(value)
+        return [
+            TagInfo(key=key, values=sorted(values_by_key[key])[:100]) # Limit values
+            for key in sorted(values_by_key)
+        ]
     else: # v1
-        query = f'SHOW TAG KEYS FROM "{measurement}"'
+        query = f'SHOW TAG KEYS FROM {_influxql_ident(measurement)}'
         key_results = influx_client.query(query, db=bucket_or_db)
         keys = [item['tagKey'] for item in key_results.get_points()]
-        tags = []
-        for key in keys:
-            # This can be slow, InfluxQL doesn't have a great way to limit this
-            values_query = f'SHOW TAG VALUES FROM "{measurement}" WITH KEY = "{key}"'
-            values_results = influx_client.query(values_query, db=bucket_or_db)
-            values = [item['value'] for item in values_results.get_points()]
-            tags.append(TagInfo(key=key, values=values[:100])) # Limit values
-        return tags
+        return _collect_tag_values(_tag_values_v1, bucket_or_db, measurement, keys)
 
 
 # --- Data Queries ---
 
 def query_timeseries_v2(
     bucket: str, measurement: str, field: str, start: datetime, stop: datetime,
-    tags: Dict[str, str], aggregate: str | None, every: str | None, limit: int, fill: str
+    tags: Dict[str, str], aggregate: str | None, every: str | None, limit: int, fill: str,
+    return_columns: bool = False,
 ) -> QueryTimeseriesResponse:
 
-    time_filter = f'start: {start.isoformat()}Z, stop: {stop.isoformat()}Z'
-    tag_filters = " and ".join([f'r["{k}"] == "{v}"' for k, v in tags.items()]) if tags else ""
-
-    flux_query = f'from(bucket: "{bucket}")\n'
-    flux_query += f'  |> range({time_filter})\n'
-    flux_query += f'  |> filter(fn: (r) => r["_measurement"] == "{measurement}")\n'
-    flux_query += f'  |> filter(fn: (r) => r["_field"] == "{field}")\n'
-    if tag_filters:
-        flux_query += f'  |> filter(fn: (r) => {tag_filters})\n'
+    tag_filters = _flux_tag_predicate(tags)
 
+    imports = ""
+    aggregate_part = ""
     if aggregate and every:
-        fill_part = f'fill(usePrevious: {"true" if fill == "previous" else "false"})' if fill != "none" else ""
+        aggregate_part = _FLUX_AGGREGATE_WINDOW.substitute(
+            every=every, fn=aggregate, create_empty="true" if fill != "none" else "false"
+        )
         if fill == "linear": # Linear is special
-             fill_part = 'interpolate.linear(every: {every})'
-
-        flux_query += f'  |> aggregateWindow(every: {every}, fn: {aggregate}, createEmpty: {"true" if fill != "none" else "false"})\n'
-        if fill_part:
-             flux_query += f'  |> {fill_part}\n'
-
-    flux_query += f'  |> limit(n: {limit})\n'
-    flux_query += f'  |> yield(name: "results")'
-
-    logger.debug(f"Executing Flux query:\n{flux_query}")
-    tables = influx_client.query(flux_query)
+            imports = 'import "interpolate"\n'
+            aggregate_part += f'  |> interpolate.linear(every: {every})\n'
+        elif fill != "none":
+            aggregate_part += f'  |> fill(usePrevious: {"true" if fill == "previous" else "false"})\n'
+
+    flux_query = _FLUX_TIMESERIES.substitute(
+        imports=imports,
+        bucket=_quote_flux(bucket),
+        start=_rfc3339(start),
+        stop=_rfc3339(stop),
+        measurement=_quote_flux(measurement),
+        field=_quote_flux(field),
+        tag_filter=_FLUX_FILTER.substitute(predicate=tag_filters) if tag_filters else "",
+        aggregate=aggregate_part,
+        limit=limit,
+    )
 
-    series = [
-        TimeseriesPoint(time_iso=rec.get_time().isoformat(), value=rec.get_value())
-        for table in tables for rec in table.records
-    ]
+    logger.debug("Executing Flux query:\n{}", flux_query)
+    if return_columns:
+        columns = _query_columns_v2(flux_query)
+        series = []
+        points_returned = len(columns.time_iso)
+    else:
+        rows = influx_client.query_csv(flux_query)
+        # Points come straight from the database, so skip per-row validation.
+        series = [
+            TimeseriesPoint.model_construct(time_iso=time_iso, value=value)
+            for time_iso, value in _iter_csv_points(rows)
+        ]
+        columns = None
+        points_returned = len(series)
 
     stats = QueryStats(
-        points_returned=len(series),
+        points_returned=points_returned,
         start_effective_iso=start.isoformat(),
         stop_effective_iso=stop.isoformat(),
         aggregate_function=aggregate,
         downsample_interval=every,
     )
-    return QueryTimeseriesResponse(series=series, stats=stats)
+    return QueryTimeseriesResponse.model_construct(series=series, stats=stats, columns=columns)
+
+
+def _query_columns_v2(flux_query: str) -> TimeseriesColumns:
+    """Runs a Flux query through pandas and returns its time/value columns."""
+    try:
+        import pandas as pd
+    except ImportError as e:
+        raise ValueError("'return_columns' requires pandas to be installed (pip install pandas).") from e
+
+    df = influx_client.query_data_frame(flux_query)
+    if isinstance(df, list): # One frame per distinct table schema
+        df = pd.concat(df, ignore_index=True) if df else pd.DataFrame()
+    if df.empty or "_time" not in df:
+        return TimeseriesColumns.model_construct(time_iso=[], value=[])
+
+    values = df["_value"].astype(object)
+    return TimeseriesColumns.model_construct(
+        time_iso=[_time_iso(t) for t in df["_time"]],
+        value=values.where(values.notna(), None).tolist(),
+    )
 
 
 def query_timeseries_v1(
     db: str, rp: str | None, measurement: str, field: str, start: datetime, stop: datetime,
-    tags: Dict[str, str], aggregate: str | None, every: str | None, limit: int, fill: str
+    tags: Dict[str, str], aggregate: str | None, every: str | None, limit: int, fill: str,
+    return_columns: bool = False,
 ) -> QueryTimeseriesResponse:
 
-    time_filter = f"time >= '{start.isoformat()}Z' AND time <= '{stop.isoformat()}Z'"
-    tag_filters = " AND ".join([f'"{k}" = \'{v}\'' for k, v in tags.items()]) if tags else ""
+    time_filter = f"time >= '{_rfc3339(start)}' AND time <= '{_rfc3339(stop)}'"
+    tag_filters = _influxql_tag_predicate(tags)
 
-    target_measurement = f'"{db}"."{rp}"."{measurement}"' if rp else f'"{db}".."{measurement}"'
+    target_measurement = _influxql_measurement(db, rp, measurement)
 
     if aggregate and every:
-        select_clause = f'{aggregate}("{field}")'
+        select_clause = f'{aggregate}({_influxql_ident(field)})'
         group_by_clause = f'GROUP BY time({every})'
         fill_clause = f'fill({fill})' if fill != "linear" else "" # InfluxQL doesn't support linear
     else:
-        select_clause = f'"{field}"'
+        select_clause = _influxql_ident(field)
         group_by_clause = ""
         fill_clause = ""
 
@@ -183,23 +401,36 @@ def query_timeseries_v1(
 
     q += f' LIMIT {limit}'
 
-    logger.debug(f"Executing InfluxQL query: {q}")
+    logger.debug("Executing InfluxQL query: {}", q)
     results = influx_client.query(q, db=db)
-    points = list(results.get_points())
 
-    series = [
-        TimeseriesPoint(time_iso=p['time'], value=p.get(aggregate, p.get(field)))
-        for p in points
-    ]
+    # Aggregated selects name the value column after the function. Points come
+    # straight from the database, so skip per-row validation.
+    value_key = aggregate if aggregate and every else field
+    if return_columns:
+        times, values = [], []
+        for p in results.get_points():
+            times.append(p['time'])
+            values.append(p.get(value_key))
+        columns = TimeseriesColumns.model_construct(time_iso=times, value=values)
+        series = []
+        points_returned = len(times)
+    else:
+        series = [
+            TimeseriesPoint.model_construct(time_iso=p['time'], value=p.get(value_key))
+            for p in results.get_points()
+        ]
+        columns = None
+        points_returned = len(series)
 
     stats = QueryStats(
-        points_returned=len(series),
+        points_returned=points_returned,
         start_effective_iso=start.isoformat(),
         stop_effective_iso=stop.isoformat(),
         aggregate_function=aggregate,
         downsample_interval=every,
     )
-    return QueryTimeseriesResponse(series=series, stats=stats)
+    return QueryTimeseriesResponse.model_construct(series=series, stats=stats, columns=columns)
 
 
 def get_timeseries_data(**kwargs) -> QueryTimeseriesResponse:
@@ -220,6 +451,7 @@ def get_timeseries_data(**kwargs) -> QueryTimeseriesResponse:
         "every": kwargs.get('every'),
         "limit": kwargs.get('limit', 1000),
         "fill": kwargs.get('fill', 'none'),
+        "return_columns": kwargs.get('return_columns', False),
     }
 
     if influx_client.version == "2":
@@ -237,16 +469,13 @@ def get_last_point(**kwargs) -> LastPointResponse:
     tags = kwargs.get('tags')
 
     if influx_client.version == "2":
-        tag_filters = " and ".join([f'r["{k}"] == "{v}"' for k, v in tags.items()]) if tags else ""
-        field_filter = f'|> filter(fn: (r) => r["_field"] == "{field}")' if field else ""
-        q = f'''
-        from(bucket: "{bucket_or_db}")
-          |> range(start: -365d) // Look back up to a year
-          |> filter(fn: (r) => r["_measurement"] == "{measurement}")
-          {field_filter}
-          {f'|> filter(fn: (r) => {tag_filters})' if tag_filters else ''}
-          |> last()
-        '''
+        tag_filters = _flux_tag_predicate(tags)
+        q = _FLUX_LAST_POINT.substitute(
+            bucket=_quote_flux(bucket_or_db),
+            measurement=_quote_flux(measurement),
+            field_filter=_FLUX_FILTER.substitute(predicate=f'r["_field"] == {_quote_flux(field)}') if field else "",
+            tag_filter=_FLUX_FILTER.substitute(predicate=tag_filters) if tag_filters else "",
+        )
         tables = influx_client.query(q)
         if not tables or not tables[0].records:
             raise ValueError("No data found for the specified criteria.")
@@ -254,15 +483,15 @@ def get_last_point(**kwargs) -> LastPointResponse:
         # With multiple fields, last() can return multiple tables. We just grab the first.
         record = tables[0].records[0]
         return LastPointResponse(
-            time_iso=record.get_time().isoformat(),
+            time_iso=_time_iso(record.get_time()),
             value=record.get_value(),
             field=record.get_field(),
             tags={k: v for k, v in record.values.items() if not k.startswith("_") and k != "result" and k != "table"}
         )
     else: # v1
-        tag_filters = " AND ".join([f'"{k}" = \'{v}\'' for k, v in tags.items()]) if tags else ""
-        select_clause = f'"{field}"' if field else "*"
-        q = f'SELECT {select_clause} FROM "{measurement}"'
+        tag_filters = _influxql_tag_predicate(tags)
+        select_clause = _influxql_ident(field) if field else "*"
+        q = f'SELECT {select_clause} FROM {_influxql_ident(measurement)}'
         if tag_filters:
             q += f' WHERE {tag_filters}'
         q += ' ORDER BY time DESC LIMIT 1'
@@ -281,3 +510,57 @@ def get_last_point(**kwargs) -> LastPointResponse:
             field=value_field,
             tags={k: v for k, v in point.items() if k != 'time' and k != value_field}
         )
+
+
+# --- Window Statistics ---
+
+def get_window_stats(**kwargs) -> WindowStatsResponse:
+    """Computes mean/min/max/last/count over a relative window in a single query."""
+    start_dt, stop_dt = parse_time_range(kwargs['window'], "now")
+    bucket_or_db, rp = _parse_target(kwargs['target'])
+    measurement = kwargs['measurement']
+    field = kwargs['field']
+    tags = kwargs.get('tags')
+
+    if influx_client.version == "2":
+        tag_filters = _flux_tag_predicate(tags)
+        q = _FLUX_WINDOW_STATS.substitute(
+            bucket=_quote_flux(bucket_or_db),
+            start=_rfc3339(start_dt),
+            stop=_rfc3339(stop_dt),
+            measurement=_quote_flux(measurement),
+            field=_quote_flux(field),
+            tag_filter=_FLUX_FILTER.substitute(predicate=tag_filters) if tag_filters else "",
+        )
+        logger.debug("Executing Flux query:\n{}", q)
+        tables = influx_client.query(q)
+        stats = {
+            rec.values.get("result"): rec.get_value()
+            for table in tables for rec in table.records
+        }
+    else: # v1
+        field_ident = _influxql_ident(field)
+        select_clause = ", ".join(
+            f'{agg.upper()}({field_ident}) AS "{agg}"' for agg in _WINDOW_STATS_AGGREGATES
+        )
+        q = (
+            f'SELECT {select_clause} '
+            f'FROM {_influxql_measurement(bucket_or_db, rp, measurement)} '
+            f"WHERE time >= '{_rfc3339(start_dt)}' AND time <= '{_rfc3339(stop_dt)}'"
+        )
+        tag_filters = _influxql_tag_predicate(tags)
+        if tag_filters:
+            q += f' AND {tag_filters}'
+        logger.debug("Executing InfluxQL query: {}", q)
+        results = influx_client.query(q, db=bucket_or_db)
+        stats = next(results.get_points(), None) or {}
+
+    return WindowStatsResponse.model_construct(
+        mean=stats.get("mean"),
+        min=stats.get("min"),
+        max=stats.get("max"),
+        last=stats.get("last"),
+        count=stats.get("count") or 0,
+        start_iso=start_dt.isoformat(),
+        stop_iso=stop_dt.isoformat(),
+    )
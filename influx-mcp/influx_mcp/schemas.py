@@ -25,6 +25,7 @@ class BucketInfo(BaseModel):
     retention_policy: Optional[str] = Field(None, description="Retention policy (for InfluxDB v1).")
 
 class ListBucketsResponse(BaseModel):
+    # Built with model_construct; entries come pre-validated from the client.
     results: List[BucketInfo]
 
 # --- Tool: list_measurements ---
@@ -33,6 +34,7 @@ class MeasurementInfo(BaseModel):
     name: str = Field(..., description="Name of the measurement.")
 
 class ListMeasurementsResponse(BaseModel):
+    # Built with model_construct; entries come pre-validated from the query layer.
     measurements: List[MeasurementInfo]
 
 # --- Tool: list_fields ---
@@ -42,6 +44,7 @@ class FieldInfo(BaseModel):
     type: Optional[str] = Field(None, description="Data type of the field, if available.")
 
 class ListFieldsResponse(BaseModel):
+    # Built with model_construct; entries come pre-validated from the query layer.
     fields: List[FieldInfo]
 
 # --- Tool: list_tags ---
@@ -51,6 +54,7 @@ class TagInfo(BaseModel):
     values: List[str] = Field(..., description="List of observed values for this tag key.")
 
 class ListTagsResponse(BaseModel):
+    # Built with model_construct; entries come pre-validated from the query layer.
     tags: List[TagInfo]
 
 # --- Tool: last_point ---
@@ -80,6 +84,7 @@ class QueryTimeseriesRequest(InfluxTarget):
     every: Optional[str] = Field(None, description="Downsampling interval (e.g., '5m', '1h'). Requires an aggregate function.")
     limit: int = Field(1000, gt=0, le=50000, description="Maximum number of data points to return.")
     fill: Optional[Literal["none", "previous", "linear"]] = Field("none", description="How to fill null values after aggregation.")
+    return_columns: bool = Field(False, description="Return the result as parallel 'columns' arrays instead of a list of points. Faster for large series (v2 requires pandas).")
 
 
 class TimeseriesPoint(BaseModel):
@@ -93,9 +98,15 @@ class QueryStats(BaseModel):
     aggregate_function: Optional[str] = None
     downsample_interval: Optional[str] = None
 
+class TimeseriesColumns(BaseModel):
+    time_iso: List[str]
+    value: List[Any]
+
 class QueryTimeseriesResponse(BaseModel):
+    # Built with model_construct; points come pre-built from the query layer.
     series: List[TimeseriesPoint]
     stats: QueryStats
+    columns: Optional[TimeseriesColumns] = Field(None, description="Columnar result, set instead of 'series' when 'return_columns' is requested.")
 
 # --- Tool: window_stats ---
 
@@ -106,6 +117,7 @@ class WindowStatsRequest(InfluxTarget):
     tags: Optional[Dict[str, str]] = Field(None, description="Key-value pairs to filter by tags.")
 
 class WindowStatsResponse(BaseModel):
+    # Built with model_construct from a single aggregate query result.
     mean: Optional[float] = None
     min: Optional[Any] = None
     max: Optional[Any] = None
@@ -1,8 +1,14 @@
 import argparse
+import inspect
 import json
-from typing import Optional
-from urllib.parse import parse_qs, urlparse
-
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import partial, wraps
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Callable, Dict, List, Mapping, Optional
+from urllib.parse import parse_qsl, urlparse
+
+import anyio.to_thread
 from loguru import logger
 from mcp.server.fastmcp.server import FastMCP, Context
 from mcp.server.fastmcp.exceptions import ToolError, ResourceError
@@ -19,160 +25,202 @@ from influx_mcp.schemas import (ErrorResponse, LastPointRequest,
                                WritePointRequest, WritePointResponse)
 
 # --- MCP Server Setup ---
+
+@asynccontextmanager
+async def lifespan(_: FastMCP) -> AsyncIterator[None]:
+    """Sizes the worker thread pool that blocking InfluxDB calls run on."""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.mcp_max_workers
+    yield
+
 server = FastMCP(
     name="influx-mcp",
     instructions="MCP server to query InfluxDB (v1/v2) for time-series data.",
+    lifespan=lifespan,
 )
 
 
 # --- Exception Handling ---
+def _tool_error(func_name: str, e: Exception) -> ToolError:
+    """Logs `e` and maps it to the ToolError reported to the MCP client."""
+    if isinstance(e, ConnectionError):
+        logger.error("Connection error in tool '{}': {}", func_name, e)
+        return ToolError(f"Connection to InfluxDB failed: {e}")
+    if isinstance(e, ValueError):
+        logger.warning("Value error in tool '{}': {}", func_name, e)
+        return ToolError(f"Invalid parameters or data: {e}")
+    logger.exception("Unexpected error in tool '{}': {}", func_name, e)
+    return ToolError(f"An unexpected internal error occurred: {e}")
+
 def handle_query_error(func):
     """Decorator to catch common exceptions and return a standard error."""
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                raise _tool_error(func.__name__, e)
+        return async_wrapper
+
+    @wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except ConnectionError as e:
-            logger.error(f"Connection error in tool '{func.__name__}': {e}")
-            raise ToolError(f"Connection to InfluxDB failed: {e}")
-        except ValueError as e:
-            logger.warning(f"Value error in tool '{func.__name__}': {e}")
-            raise ToolError(f"Invalid parameters or data: {e}")
         except Exception as e:
-            logger.exception(f"Unexpected error in tool '{func.__name__}': {e}")
-            raise ToolError(f"An unexpected internal error occurred: {e}")
+            raise _tool_error(func.__name__, e)
     return wrapper
 
+async def _run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking InfluxDB call on a worker thread, so concurrent clients
+    are not serialized on the event loop.
+    """
+    return await anyio.to_thread.run_sync(partial(func, *args, **kwargs))
+
 # --- MCP Tools ---
 
 @server.tool()
 @handle_query_error
-def list_buckets_or_dbs() -> ListBucketsResponse:
+async def list_buckets_or_dbs() -> ListBucketsResponse:
     """
     Lists all available buckets (for InfluxDB v2) or databases (for InfluxDB v1).
     For v1, it may also show retention policies.
     """
-    results = queries.list_buckets_or_dbs()
-    return ListBucketsResponse(results=results)
+    results = await _run_blocking(queries.list_buckets_or_dbs)
+    return ListBucketsResponse.model_construct(results=results)
 
 @server.tool()
 @handle_query_error
-def list_measurements(target: str) -> ListMeasurementsResponse:
+async def list_measurements(target: str) -> ListMeasurementsResponse:
     """Lists all measurements within a specific bucket or database."""
-    results = queries.list_measurements(target=target)
-    return ListMeasurementsResponse(measurements=results)
+    results = await _run_blocking(queries.list_measurements, target=target)
+    return ListMeasurementsResponse.model_construct(measurements=results)
 
 @server.tool()
 @handle_query_error
-def list_fields(target: str, measurement: str) -> ListFieldsResponse:
+async def list_fields(target: str, measurement: str) -> ListFieldsResponse:
     """Lists all field keys for a given measurement."""
-    results = queries.list_fields(target=target, measurement=measurement)
-    return ListFieldsResponse(fields=results)
+    results = await _run_blocking(queries.list_fields, target=target, measurement=measurement)
+    return ListFieldsResponse.model_construct(fields=results)
 
 @server.tool()
 @handle_query_error
-def list_tags(target: str, measurement: str) -> ListTagsResponse:
+async def list_tags(target: str, measurement: str) -> ListTagsResponse:
     """Lists all tag keys and a sample of their values for a given measurement."""
-    results = queries.list_tags(target=target, measurement=measurement)
-    return ListTagsResponse(tags=results)
+    results = await _run_blocking(queries.list_tags, target=target, measurement=measurement)
+    return ListTagsResponse.model_construct(tags=results)
 
 @server.tool()
 @handle_query_error
-def last_point(request: LastPointRequest) -> queries.LastPointResponse:
+async def last_point(request: LastPointRequest) -> queries.LastPointResponse:
     """Retrieves the most recent data point for a specific time series."""
-    return queries.get_last_point(**request.model_dump())
+    return await _run_blocking(queries.get_last_point, **request.model_dump())
 
 @server.tool()
 @handle_query_error
-def query_timeseries(request: QueryTimeseriesRequest) -> QueryTimeseriesResponse:
+async def query_timeseries(request: QueryTimeseriesRequest) -> QueryTimeseriesResponse:
     """
     Queries time-series data with filters, aggregation, and downsampling.
     'start' and 'stop' can be ISO 8601 or relative (e.g., '-24h').
     """
-    return queries.get_timeseries_data(**request.model_dump())
+    return await _run_blocking(queries.get_timeseries_data, **request.model_dump())
 
 @server.tool()
 @handle_query_error
-def window_stats(request: WindowStatsRequest) -> WindowStatsResponse:
+async def window_stats(request: WindowStatsRequest) -> WindowStatsResponse:
     """
     Calculates aggregate statistics (mean, min, max, etc.) over a specified time window.
     """
-    # This is a shortcut for a query_timeseries call
-    start_dt, stop_dt = queries.parse_time_range(request.window, "now")
+    return await _run_blocking(queries.get_window_stats, **request.model_dump())
 
-    # We need to run multiple aggregations.
-    # For simplicity, we'll do them as separate queries, but a single, more complex query is possible.
+# Shared read-only stand-in for missing tags, so untagged points don't each
+# allocate an empty dict.
+EMPTY_DICT: Mapping[str, str] = MappingProxyType({})
 
-    base_params = request.model_dump()
-    base_params["start"] = start_dt.isoformat()
-    base_params["stop"] = stop_dt.isoformat()
-    del base_params["window"]
 
-    def get_agg(func):
-        try:
-            res = queries.get_timeseries_data(**base_params, aggregate=func, every=request.window.replace('-', ''))
-            return res.series[0].value if res.series else None
-        except (ValueError, IndexError):
-            return None
-
-    count_res = queries.get_timeseries_data(**base_params, aggregate='count', every=request.window.replace('-', ''))
-
-    return WindowStatsResponse(
-        mean=get_agg('mean'),
-        min=get_agg('min'),
-        max=get_agg('max'),
-        last=get_agg('last'),
-        count=count_res.series[0].value if count_res.series else 0,
-        start_iso=start_dt.isoformat(),
-        stop_iso=stop_dt.isoformat(),
-    )
+def _build_point(request: WritePointRequest) -> dict:
+    """Converts a write request into the point dict both client libraries accept."""
+    return {
+        "measurement": request.measurement,
+        "tags": request.tags or EMPTY_DICT,
+        "fields": request.fields,
+        "time": request.time_iso
+    }
+
+
+def _write_points(requests: List[WritePointRequest]) -> int:
+    """
+    Writes points with one client call per target and returns how many were
+    written. Targets parse to a bucket (v2) or a database and retention
+    policy (v1), and each group is sent as a single batch.
+    """
+    groups: Dict[queries.TargetParts, List[WritePointRequest]] = defaultdict(list)
+    for request in requests:
+        groups[queries._parse_target(request.target)].append(request)
+
+    is_v2 = influx_client.version == "2"
+    written = 0
+    for (bucket_or_db, rp), group in groups.items():
+        points = [_build_point(request) for request in group]
+        if is_v2:
+            success = influx_client.write(bucket=bucket_or_db, record=points)
+        else: # v1
+            success = influx_client.write(points, database=bucket_or_db, retention_policy=rp)
+        if not success:
+            continue
+
+        written += len(points)
+        # The write may have added a measurement, field or tag value.
+        for target, measurement in {(r.target, r.measurement) for r in group}:
+            queries.invalidate_schema_cache(target, measurement)
+    return written
+
 
 @server.tool()
 @handle_query_error
-def write_point(request: WritePointRequest) -> WritePointResponse:
+async def write_point(request: WritePointRequest) -> WritePointResponse:
     """
     Writes a single data point to a measurement. (Use with caution)
     """
-    target = request.target
-    bucket_or_db, rp = queries._parse_target(target)
-
-    point = {
-        "measurement": request.measurement,
-        "tags": request.tags or {},
-        "fields": request.fields,
-        "time": request.time_iso
-    }
+    written = await _run_blocking(_write_points, [request])
+    return WritePointResponse(ok=bool(written), written=written)
 
-    if influx_client.version == "2":
-        success = influx_client.write(bucket=bucket_or_db, record=point)
-    else: # v1
-        success = influx_client.write([point], database=bucket_or_db, retention_policy=rp)
-
-    return WritePointResponse(ok=bool(success), written=1 if success else 0)
+@server.tool()
+@handle_query_error
+async def write_points(requests: List[WritePointRequest]) -> WritePointResponse:
+    """
+    Writes several data points in as few batches as possible, one per target. (Use with caution)
+    """
+    written = await _run_blocking(_write_points, requests)
+    return WritePointResponse(ok=written == len(requests), written=written)
 
 
 # --- MCP Resource ---
 
+# Resource query parameters with a fixed meaning; any other key is a tag filter.
+RESOURCE_RESERVED_PARAMS = frozenset({"field", "start", "stop", "aggregate", "every", "limit", "include_json"})
+
 @server.resource("influxdb://{target}/{measurement}")
-def read_influxdb_resource(target: str, measurement: str, context: Context) -> str:
+async def read_influxdb_resource(target: str, measurement: str, context: Context) -> str:
     """
     Reads a time-series from InfluxDB as a resource.
     Query parameters like 'field', 'start', 'stop', 'aggregate', 'every', 'limit',
     and tags (e.g., 'device_id=abc') must be provided in the URI.
+    Add 'include_json=true' to append the full JSON response, or
+    'include_json=compact' for the same without indentation.
     Example: influxdb://bucket/meas?field=temp&start=-1d&device_id=123
     """
-    query_params = parse_qs(context.request_context.request.url.query)
-
-    # Helper to get a single value from parsed query params
-    def get_param(name, default=None):
-        return query_params.get(name, [default])[0]
+    req_url = context.request_context.request.url
+    # Single-valued params: for a repeated key the last occurrence wins.
+    query_params = dict(parse_qsl(req_url.query))
+    get_param = query_params.get
 
     field = get_param("field")
     if not field:
         raise ResourceError("Query parameter 'field' is required.")
 
     # Extract tags from any other query parameters
-    reserved_params = {"field", "start", "stop", "aggregate", "every", "limit"}
-    tags = {k: v[0] for k, v in query_params.items() if k not in reserved_params}
+    tags = {k: v for k, v in query_params.items() if k not in RESOURCE_RESERVED_PARAMS}
 
     try:
         request = QueryTimeseriesRequest(
@@ -186,27 +234,36 @@ def read_influxdb_resource(target: str, measurement: str, context: Context) -> s
             limit=int(get_param("limit", 1000)),
             tags=tags if tags else None
         )
-        response = query_timeseries(request)
+        response = await query_timeseries(request)
     except Exception as e:
         raise ResourceError(f"Failed to execute resource query: {e}")
 
 
     # Format output
-    uri = str(context.request_context.request.url)
-    header = f"--- Query Results for {uri} ---\n"
-    header += f"Status: {response.stats.points_returned} points returned\n"
-    header += f"Time Range: {response.stats.start_effective_iso} to {response.stats.stop_effective_iso}\n"
-
-    body = ""
-    for i, point in enumerate(response.series):
-        if i < 20: # Show first 20 points
-            body += f"{point.time_iso}\t{point.value}\n"
-    if len(response.series) > 20:
-        body += f"... (truncated, {len(response.series) - 20} more points)\n"
-
-    footer = f"\n--- Full JSON Response ---\n{response.model_dump_json(indent=2)}"
-
-    return header + body + footer
+    stats = response.stats
+    series = response.series
+    n = len(series)
+    parts = [
+        f"--- Query Results for {req_url} ---\n",
+        f"Status: {stats.points_returned} points returned\n",
+        f"Time Range: {stats.start_effective_iso} to {stats.stop_effective_iso}\n",
+    ]
+    if n:
+        parts.append("\n".join(f"{point.time_iso}\t{point.value}" for point in series[:20])) # Show first 20 points
+        parts.append("\n")
+    extra = n - 20
+    if extra > 0:
+        parts.append(f"... (truncated, {extra} more points)\n")
+
+    # The full JSON dump can dwarf the preview, so only serialize it on request.
+    include_json = get_param("include_json", "").lower()
+    if include_json == "compact":
+        parts.append("\n--- Full JSON Response ---\n")
+        parts.append(response.model_dump_json())
+    elif include_json in ("true", "1", "yes"):
+        parts.append("\n--- Full JSON Response ---\n")
+        parts.append(response.model_dump_json(indent=2))
+    return "".join(parts)
 
 # --- Main Execution ---
 
@@ -220,24 +277,24 @@ def main():
     args = parser.parse_args()
 
     setup_logging(settings.mcp_log_level)
-    logger.info(f"Loaded settings: {settings!r}")
+    logger.info("Loaded settings: {!r}", settings)
 
     if args.dry_run:
         logger.info("--- Performing dry run ---")
         try:
-            logger.info(f"Attempting to ping InfluxDB (version: {influx_client.version})...")
+            logger.info("Attempting to ping InfluxDB (version: {})...", influx_client.version)
             if influx_client.ping():
                 logger.success("Ping successful!")
                 caps = influx_client.list_buckets_or_dbs()
-                logger.info(f"Found {len(caps)} buckets/databases:")
+                logger.info("Found {} buckets/databases:", len(caps))
                 for cap in caps[:5]:
-                    logger.info(f"  - {cap.name} (type: {cap.type})")
+                    logger.info("  - {} (type: {})", cap.name, cap.type)
                 if len(caps) > 5:
                     logger.info("  ...")
             else:
                 logger.error("Ping failed. Check connection details.")
         except Exception as e:
-            logger.error(f"Dry run failed: {e}")
+            logger.error("Dry run failed: {}", e)
         return
 
     logger.info("Starting MCP server...")
@@ -1,9 +1,20 @@
+import inspect
 import re
+import threading
+import time
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache, wraps
+from typing import Callable, Hashable, Optional
 
-from dateutil.parser import parse as parse_iso
 from pydantic import SecretStr
 
+# Relative time units and the timedelta keyword each one maps to.
+_UNIT_TO_KW = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+_RELATIVE_TIME_RE = re.compile(r"^-(\d+)([smhdw])$")
+
+# Keys whose values are always masked by `mask_sensitive_data`.
+SENSITIVE_KEYS = frozenset({"token", "password"})
+
 
 def parse_time_range(start: str, stop: str | None = "now") -> tuple[datetime, datetime]:
     """
@@ -11,7 +22,7 @@ def parse_time_range(start: str, stop: str | None = "now") -> tuple[datetime, da
 
     Relative formats:
     - 'now'
-    - '-<number><unit>', e.g., '-15m', '-24h', '-7d'
+    - '-<number><unit>' with unit s, m, h, d or w, e.g., '-15m', '-24h', '-7d'
 
     Returns a tuple of two timezone-aware datetime objects (start, stop) in UTC.
     """
@@ -23,51 +34,121 @@ def parse_time_range(start: str, stop: str | None = "now") -> tuple[datetime, da
 
 def _parse_time_string(time_str: str, relative_to: datetime | None = None) -> datetime:
     """Helper to parse a single time string."""
-    now = datetime.now(timezone.utc)
-
     if time_str.lower() in ("now", "now()"):
-        return now
+        return datetime.now(timezone.utc)
 
     # Check for relative time format, e.g., "-7d"
-    relative_match = re.match(r"^-(\d+)([mhd])$", time_str)
-    if relative_match:
-        value = int(relative_match.group(1))
-        unit = relative_match.group(2)
-
-        delta = timedelta()
-        if unit == 'm':
-            delta = timedelta(minutes=value)
-        elif unit == 'h':
-            delta = timedelta(hours=value)
-        elif unit == 'd':
-            delta = timedelta(days=value)
-
-        base_time = relative_to if relative_to else now
+    delta = _parse_relative(time_str)
+    if delta is not None:
+        base_time = relative_to if relative_to else datetime.now(timezone.utc)
         return base_time - delta
 
     # Assume ISO 8601 format
     try:
-        dt = parse_iso(time_str)
-        # If no timezone info, assume UTC
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        return dt
+        return _parse_absolute(time_str)
     except ValueError as e:
         raise ValueError(f"Invalid time format '{time_str}'. Must be ISO 8601 or relative (e.g., '-7d').") from e
 
 
+@lru_cache(maxsize=256)
+def _parse_relative(time_str: str) -> timedelta | None:
+    """Returns the offset for a relative time string, or None if it isn't one."""
+    relative_match = _RELATIVE_TIME_RE.match(time_str)
+    if not relative_match:
+        return None
+    value, unit = relative_match.groups()
+    return timedelta(**{_UNIT_TO_KW[unit]: int(value)})
+
+
+@lru_cache(maxsize=512)
+def _parse_absolute(time_str: str) -> datetime:
+    """Parses an ISO 8601 string. Results are deterministic, so they are memoized."""
+    # datetime.fromisoformat is C-implemented and accepts a trailing "Z" on 3.11+.
+    dt = datetime.fromisoformat(time_str)
+    # If no timezone info, assume UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
 def mask_sensitive_data(data: dict) -> dict:
     """
-    Recursively traverses a dictionary and masks values of fields
+    Traverses a (possibly nested) dictionary and masks values of fields
     that are SecretStr instances or have names suggesting sensitivity.
     """
-    sensitive_keys = {"token", "password"}
-    masked_data = {}
-    for key, value in data.items():
-        if isinstance(value, SecretStr) or key in sensitive_keys:
-            masked_data[key] = "***"
-        elif isinstance(value, dict):
-            masked_data[key] = mask_sensitive_data(value)
-        else:
-            masked_data[key] = value
+    masked_data: dict = {}
+    stack = [(data, masked_data)]
+    while stack:
+        src, dst = stack.pop()
+        for key, value in src.items():
+            if key in SENSITIVE_KEYS or isinstance(value, SecretStr):
+                dst[key] = "***"
+            elif isinstance(value, dict):
+                dst[key] = nested = {}
+                stack.append((value, nested))
+            else:
+                dst[key] = value
     return masked_data
+
+
+def ttl_cache(ttl: float, maxsize: int = 512, scope: Optional[Callable[[], Hashable]] = None):
+    """
+    Memoizes a function's results for `ttl` seconds.
+
+    The cache key is built from the call arguments, bound to the function's
+    signature so positional and keyword calls share an entry, plus the value
+    returned by the optional `scope` callable (e.g. the active client
+    version). Calls with unhashable arguments bypass the cache. The wrapped
+    function gains `cache_clear()` and `cache_pop(*args, **kwargs)` methods
+    for manual invalidation; `cache_pop` takes the arguments of the call to
+    forget. A non-positive `ttl` disables caching.
+    """
+    def decorator(func):
+        cache: dict = {}
+        lock = threading.Lock()
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return (scope() if scope else None, tuple(bound.arguments.values()))
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if ttl <= 0:
+                return func(*args, **kwargs)
+
+            key = make_key(args, kwargs)
+            try:
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+
+            now = time.monotonic()
+            with lock:
+                entry = cache.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+            value = func(*args, **kwargs)
+            with lock:
+                if key not in cache and len(cache) >= maxsize:
+                    for k in [k for k, (expires, _) in cache.items() if expires <= now]:
+                        del cache[k]
+                    if len(cache) >= maxsize:
+                        del cache[next(iter(cache))] # Evict the oldest entry
+                cache[key] = (now + ttl, value)
+            return value
+
+        def cache_clear() -> None:
+            with lock:
+                cache.clear()
+
+        def cache_pop(*args, **kwargs) -> None:
+            with lock:
+                cache.pop(make_key(args, kwargs), None)
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_pop = cache_pop
+        return wrapper
+    return decorator
@@ -0,0 +1,250 @@
+import socket
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+from influxdb_client import BucketsApi, WritePrecision
+from influxdb_client.client.write_api import SYNCHRONOUS
+
+from influx_mcp import client
+from influx_mcp.client import InfluxDBV1ClientImpl, InfluxDBV2ClientImpl, Settings
+
+
+def make_settings(**env):
+    """Builds Settings from explicit values only, ignoring any .env file."""
+    env.setdefault("INFLUX_URL", "http://influx.test:8086")
+    return Settings(_env_file=None, **env)
+
+
+@pytest.fixture
+def mock_v1_library(mocker):
+    """Fixture to replace the influxdb InfluxDBClient class with a mock."""
+    return mocker.patch.object(client, "InfluxDBClient")
+
+
+@pytest.fixture
+def mock_v2_library(mocker):
+    """Fixture to replace the influxdb_client InfluxDBClient class with a mock."""
+    return mocker.patch.object(client, "InfluxDBClientV2")
+
+
+def test_v2_writes_synchronously(mock_v2_library):
+    """v2 writes should block until the server accepts them, so the tools report real results."""
+    v2 = InfluxDBV2ClientImpl(make_settings(INFLUX_ORG="my-org"))
+    write_api = mock_v2_library.return_value.write_api
+
+    assert v2.write(bucket="iot-bucket", record=[{"measurement": "temp", "fields": {"value": 1.0}}])
+
+    write_api.assert_called_once_with(write_options=SYNCHRONOUS)
+    write_api.return_value.write.assert_called_once_with(
+        bucket="iot-bucket",
+        record=[{"measurement": "temp", "fields": {"value": 1.0}}],
+        write_precision=WritePrecision.NS,
+    )
+
+
+def test_v2_write_errors_propagate(mock_v2_library):
+    """A failed v2 write must raise instead of being reported as written."""
+    v2 = InfluxDBV2ClientImpl(make_settings())
+    mock_v2_library.return_value.write_api.return_value.write.side_effect = ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        v2.write(bucket="iot-bucket", record=[])
+
+
+def test_v2_close_closes_write_api_first(mock_v2_library, mocker):
+    """close() should close the write API before the underlying connection."""
+    v2 = InfluxDBV2ClientImpl(make_settings())
+    calls = mocker.Mock()
+    calls.attach_mock(mock_v2_library.return_value.write_api.return_value.close, "write_api_close")
+    calls.attach_mock(mock_v2_library.return_value.close, "client_close")
+
+    v2.close()
+
+    assert [c[0] for c in calls.mock_calls] == ["write_api_close", "client_close"]
+
+
+def _probe(result, delay=0.0):
+    """Builds a fake version probe that answers `result` after `delay` seconds."""
+    def probe(base_url):
+        time.sleep(delay)
+        return result
+    return probe
+
+
+def test_detect_version_prefers_v2_over_faster_v1(monkeypatch):
+    """v2 servers also answer /ping, so a quick v1 hit must wait for the v2 probe."""
+    monkeypatch.setattr(client, "_probe_v2", _probe(("v2", True), delay=0.2))
+    monkeypatch.setattr(client, "_probe_v1", _probe(("v1", True)))
+
+    assert client._detect_version("http://influx.test:8086") == "2"
+
+
+def test_detect_version_falls_back_to_v1(monkeypatch):
+    """v1 is chosen once the v2 probe has failed."""
+    monkeypatch.setattr(client, "_probe_v2", _probe((None, False), delay=0.1))
+    monkeypatch.setattr(client, "_probe_v1", _probe(("v1", True)))
+
+    assert client._detect_version("http://influx.test:8086") == "1"
+
+
+def test_detect_version_falls_back_to_v1_when_v2_hangs(monkeypatch):
+    """v1 is chosen when the v2 probe outlasts the overall detection budget."""
+    monkeypatch.setattr(client, "_DETECT_TIMEOUT_SEC", 0.2)
+    monkeypatch.setattr(client, "_probe_v2", _probe(("v2", True), delay=1.0))
+    monkeypatch.setattr(client, "_probe_v1", _probe(("v1", True)))
+
+    assert client._detect_version("http://influx.test:8086") == "1"
+
+
+def test_detect_version_both_fail(monkeypatch):
+    """No version is detected when neither probe succeeds."""
+    monkeypatch.setattr(client, "_probe_v2", _probe((None, False)))
+    monkeypatch.setattr(client, "_probe_v1", _probe((None, False)))
+
+    assert client._detect_version("http://influx.test:8086") is None
+
+
+def test_detect_version_budget_outlasts_probe_timeouts():
+    """The overall wait must cover a probe's connect and read timeouts."""
+    assert client._DETECT_TIMEOUT_SEC > 2 * client._PROBE_TIMEOUT_SEC
+
+
+def test_probes_share_the_pooled_session():
+    """Both version probes should reuse one pooled keep-alive session."""
+    adapter = client._probe_session.get_adapter("http://influx.test:8086")
+
+    assert adapter is client._probe_session.get_adapter("https://influx.test:8086")
+    assert adapter is client._probe_adapter
+    assert adapter._pool_maxsize == 4
+
+
+@pytest.mark.parametrize("probe, path, status, expected", [
+    ("_probe_v2", "/api/v2/ready", 200, ("v2", True)),
+    ("_probe_v2", "/api/v2/ready", 404, (None, False)),
+    ("_probe_v1", "/ping", 204, ("v1", True)),
+    ("_probe_v1", "/ping", 200, (None, False)),
+])
+def test_probe_status_codes(mocker, probe, path, status, expected):
+    """Each probe should hit its endpoint on the shared session and check the status code."""
+    get = mocker.patch.object(client._probe_session, "get")
+    get.return_value.status_code = status
+
+    assert getattr(client, probe)("http://influx.test:8086") == expected
+    get.assert_called_once_with(f"http://influx.test:8086{path}", timeout=client._PROBE_TIMEOUT_SEC)
+
+
+def test_probe_connection_error(mocker):
+    """A probe that cannot connect should report failure instead of raising."""
+    mocker.patch.object(client._probe_session, "get", side_effect=requests.ConnectionError("refused"))
+
+    assert client._probe_v2("http://influx.test:8086") == (None, False)
+    assert client._probe_v1("http://influx.test:8086") == (None, False)
+
+
+def test_v1_connection_pool(mock_v1_library):
+    """The v1 client should get a large keep-alive pool and low-latency socket options."""
+    InfluxDBV1ClientImpl(make_settings(INFLUX_URL="https://[::1]:8087"))
+
+    kwargs = mock_v1_library.call_args.kwargs
+    assert (kwargs["host"], kwargs["port"], kwargs["ssl"]) == ("[::1]", 8087, True)
+    assert kwargs["pool_size"] == client._POOL_MAXSIZE == 64
+    assert (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) in kwargs["socket_options"]
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in kwargs["socket_options"]
+
+
+def test_v2_connection_pool(mock_v2_library):
+    """The v2 client should get the same pool size plus a small retry policy."""
+    InfluxDBV2ClientImpl(make_settings())
+
+    kwargs = mock_v2_library.call_args.kwargs
+    assert kwargs["connection_pool_maxsize"] == client._POOL_MAXSIZE
+    assert kwargs["retries"].total == 3
+
+
+def test_clients_enable_gzip(mock_v1_library, mock_v2_library):
+    """Both clients should compress request and response bodies."""
+    InfluxDBV1ClientImpl(make_settings())
+    InfluxDBV2ClientImpl(make_settings())
+
+    assert mock_v1_library.call_args.kwargs["gzip"] is True
+    assert mock_v2_library.call_args.kwargs["enable_gzip"] is True
+
+
+def test_v1_write_defaults_batch_size(mock_v1_library):
+    """v1 writes should be chunked into batches unless the caller picks a size."""
+    v1 = InfluxDBV1ClientImpl(make_settings())
+    write_points = mock_v1_library.return_value.write_points
+
+    v1.write([{"measurement": "temp"}], database="iot-db")
+    v1.write([{"measurement": "temp"}], database="iot-db", batch_size=10)
+
+    assert write_points.call_args_list[0].kwargs == {"database": "iot-db", "batch_size": 5000}
+    assert write_points.call_args_list[1].kwargs == {"database": "iot-db", "batch_size": 10}
+
+
+@pytest.mark.parametrize("precision, expected", [
+    ("ns", WritePrecision.NS),
+    ("us", WritePrecision.US),
+    ("ms", WritePrecision.MS),
+    ("s", WritePrecision.S),
+])
+def test_v2_write_precision_from_settings(mock_v2_library, precision, expected):
+    """INFLUX_WRITE_PRECISION should map onto the matching WritePrecision for every write."""
+    v2 = InfluxDBV2ClientImpl(make_settings(INFLUX_WRITE_PRECISION=precision))
+
+    v2.write(bucket="iot-bucket", record=[])
+
+    write = mock_v2_library.return_value.write_api.return_value.write
+    assert write.call_args.kwargs["write_precision"] == expected
+
+
+def test_v2_write_precision_can_be_overridden(mock_v2_library):
+    """An explicit write_precision from the caller should win over the configured one."""
+    v2 = InfluxDBV2ClientImpl(make_settings(INFLUX_WRITE_PRECISION="s"))
+
+    v2.write(bucket="iot-bucket", record=[], write_precision=WritePrecision.MS)
+
+    write = mock_v2_library.return_value.write_api.return_value.write
+    assert write.call_args.kwargs["write_precision"] == WritePrecision.MS
+
+
+def test_v2_list_buckets_follows_every_page(mock_v2_library, mocker):
+    """Bucket listing should walk all pages, not stop at the first one."""
+    buckets_api = BucketsApi(mocker.MagicMock())
+    buckets_api._buckets_service = mocker.Mock()
+    names = [f"bucket-{i:03d}" for i in range(250)]
+    pages = [names[:100], names[100:200], names[200:]]
+    buckets_api._buckets_service.get_buckets.side_effect = [
+        SimpleNamespace(
+            buckets=[SimpleNamespace(id=name, name=name) for name in page],
+            links=SimpleNamespace(next="next" if i < len(pages) - 1 else None),
+        )
+        for i, page in enumerate(pages)
+    ]
+    mock_v2_library.return_value.buckets_api.return_value = buckets_api
+
+    buckets = InfluxDBV2ClientImpl(make_settings()).list_buckets_or_dbs()
+
+    assert [b.name for b in buckets] == names
+    assert {b.type for b in buckets} == {"bucket"}
+    calls = buckets_api._buckets_service.get_buckets.call_args_list
+    assert [c.kwargs for c in calls] == [
+        {"limit": 100},
+        {"limit": 100, "after": "bucket-099"},
+        {"limit": 100, "after": "bucket-199"},
+    ]
+
+
+def test_clients_receive_unwrapped_secrets(mock_v1_library, mock_v2_library):
+    """Clients should be handed the plain token/password, unwrapped once per Settings."""
+    settings = make_settings(INFLUX_TOKEN="v2-token", INFLUX_USERNAME="admin", INFLUX_PASSWORD="v1-password")
+
+    InfluxDBV1ClientImpl(settings)
+    InfluxDBV2ClientImpl(settings)
+
+    assert mock_v1_library.call_args.kwargs["password"] == "v1-password"
+    assert mock_v2_library.call_args.kwargs["token"] == "v2-token"
+    assert settings.get_influx_token() is settings.influx_token_str
+    assert "v2-token" not in repr(settings) and "v1-password" not in repr(settings)
@@ -3,9 +3,10 @@ import sys
 from importlib import reload
 
 import pytest
-from pydantic import ValidationError
+from pydantic import SecretStr, ValidationError
 
 from influx_mcp import config
+from influx_mcp.utils import mask_sensitive_data
 
 
 def test_settings_load_from_env(monkeypatch):
@@ -50,3 +51,31 @@ def test_settings_repr_masks_secrets(monkeypatch):
     assert "influx_token': '***'" in settings_repr
     assert "influx_password': '***'" in settings_repr
     assert "http://test.com" in settings_repr
+
+
+def test_settings_influx_url_parts(monkeypatch):
+    """Tests that INFLUX_URL is parsed once into its components."""
+    monkeypatch.setenv("INFLUX_URL", "https://influx.example.com:8443")
+
+    reload(config)
+    parts = config.settings.influx_url_parts
+
+    assert parts.scheme == "https"
+    assert parts.hostname == "influx.example.com"
+    assert parts.port == 8443
+    assert config.settings.influx_url_parts is parts
+
+
+def test_mask_sensitive_data_nested():
+    """Tests that masking reaches nested dictionaries and keeps key order."""
+    data = {
+        "url": "http://test.com",
+        "auth": {"token": "t", "nested": {"password": "p", "api": SecretStr("s")}},
+        "org": "my-org",
+    }
+
+    masked = mask_sensitive_data(data)
+
+    assert list(masked) == ["url", "auth", "org"]
+    assert masked["auth"] == {"token": "***", "nested": {"password": "***", "api": "***"}}
+    assert data["auth"]["token"] == "t"
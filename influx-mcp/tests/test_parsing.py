@@ -2,7 +2,7 @@ from datetime import datetime, timedelta, timezone
 
 import pytest
 
-from influx_mcp.utils import parse_time_range
+from influx_mcp.utils import parse_time_range, ttl_cache
 
 
 def test_parse_time_range_relative():
@@ -29,6 +29,14 @@ def test_parse_time_range_iso_8601():
     assert stop == datetime(2023, 1, 2, 0, 0, 0, tzinfo=timezone.utc)
 
 
+def test_parse_time_range_iso_8601_offsets():
+    """Tests ISO 8601 strings with offsets, fractions and no timezone."""
+    start, stop = parse_time_range("2023-01-01T02:00:00+02:00", "2023-01-01T00:00:00.250")
+
+    assert start == datetime(2023, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+    assert stop == datetime(2023, 1, 1, 0, 0, 0, 250000, tzinfo=timezone.utc)
+
+
 def test_parse_time_range_mixed():
     """Tests parsing a mix of relative and absolute times."""
     start_iso = "2023-01-01T00:00:00Z"
@@ -49,6 +57,21 @@ def test_parse_time_range_default_stop():
     assert (start - expected_start).total_seconds() < 1
 
 
+def test_parse_time_range_relative_units():
+    """Tests that every supported relative unit is measured back from stop."""
+    stop_iso = "2023-01-08T00:00:00Z"
+    expected = {
+        "-30s": timedelta(seconds=30),
+        "-15m": timedelta(minutes=15),
+        "-6h": timedelta(hours=6),
+        "-2d": timedelta(days=2),
+        "-1w": timedelta(weeks=1),
+    }
+    for start, delta in expected.items():
+        start_dt, stop_dt = parse_time_range(start, stop_iso)
+        assert stop_dt - start_dt == delta
+
+
 def test_invalid_time_format_raises_error():
     """Tests that an invalid time string raises a ValueError."""
     with pytest.raises(ValueError, match="Invalid time format"):
@@ -56,3 +79,19 @@ def test_invalid_time_format_raises_error():
 
     with pytest.raises(ValueError, match="Invalid time format"):
         parse_time_range("-5y") # 'y' is not a supported unit in our simple parser
+
+
+def test_ttl_cache_keys_ignore_call_style():
+    """Positional and keyword calls should share one cache entry, and cache_pop either."""
+    calls = []
+
+    @ttl_cache(ttl=60)
+    def lookup(db, measurement="cpu"):
+        calls.append((db, measurement))
+        return len(calls)
+
+    assert lookup("telegraf") == lookup(db="telegraf") == lookup("telegraf", measurement="cpu") == 1
+
+    lookup.cache_pop(db="telegraf")
+    assert lookup("telegraf", "cpu") == 2
+    assert calls == [("telegraf", "cpu"), ("telegraf", "cpu")]
@@ -1,4 +1,8 @@
+import asyncio
+import sys
+
 import pytest
+from mcp.server.fastmcp.exceptions import ToolError
 
 from influx_mcp import server
 from influx_mcp.client import InfluxClient
@@ -21,6 +25,22 @@ def patch_influx_client(monkeypatch, mock_influx_client):
     return mock_influx_client
 
 
+@pytest.fixture(autouse=True)
+def clear_schema_cache():
+    """Auto-used fixture so memoized schema results don't leak between tests."""
+    server.queries.clear_schema_cache()
+    yield
+    server.queries.clear_schema_cache()
+
+
+def test_tools_registered_under_their_own_names():
+    """The error-handling decorator must keep each tool's name and signature."""
+    tools = {tool.name: tool for tool in asyncio.run(server.server.list_tools())}
+
+    assert {"list_buckets_or_dbs", "list_tags", "query_timeseries", "write_point", "write_points"} <= set(tools)
+    assert set(tools["list_tags"].inputSchema["properties"]) == {"target", "measurement"}
+
+
 def test_list_buckets_smoke(mock_influx_client):
     """Smoke test for the list_buckets_or_dbs tool."""
     # Arrange
@@ -29,7 +49,7 @@ def test_list_buckets_smoke(mock_influx_client):
     ]
 
     # Act
-    response = server.list_buckets_or_dbs()
+    response = asyncio.run(server.list_buckets_or_dbs())
 
     # Assert
     mock_influx_client.list_buckets_or_dbs.assert_called_once()
@@ -37,6 +57,92 @@ def test_list_buckets_smoke(mock_influx_client):
     assert response.results[0].name == "test-bucket"
 
 
+def test_list_buckets_is_cached(mock_influx_client):
+    """Repeated schema calls within the TTL should hit the cache."""
+    mock_influx_client.list_buckets_or_dbs.return_value = [
+        server.queries.BucketInfo(name="test-bucket", type="bucket")
+    ]
+
+    asyncio.run(server.list_buckets_or_dbs())
+    asyncio.run(server.list_buckets_or_dbs())
+    mock_influx_client.list_buckets_or_dbs.assert_called_once()
+
+    server.queries.clear_schema_cache()
+    asyncio.run(server.list_buckets_or_dbs())
+    assert mock_influx_client.list_buckets_or_dbs.call_count == 2
+
+
+def test_write_point_invalidates_schema_cache(mock_influx_client):
+    """A successful write should drop cached schema results for its measurement only."""
+    mock_influx_client.version = "2"
+    mock_influx_client.query.return_value = []
+    mock_influx_client.write.return_value = True
+
+    asyncio.run(server.list_fields(target="iot-bucket", measurement="temp"))
+    asyncio.run(server.list_fields(target="iot-bucket", measurement="humidity"))
+    asyncio.run(server.write_point(server.WritePointRequest(target="iot-bucket", measurement="temp", fields={"value": 1.0})))
+    asyncio.run(server.list_fields(target="iot-bucket", measurement="temp"))
+    asyncio.run(server.list_fields(target="iot-bucket", measurement="humidity"))
+
+    assert mock_influx_client.query.call_count == 3
+    mock_influx_client.write.assert_called_once()
+
+
+def test_write_to_retention_policy_invalidates_database_cache(mock_influx_client):
+    """'db' and 'db/rp' name the same database, so they must share schema cache entries."""
+    mock_influx_client.version = "1"
+    from influxdb.resultset import ResultSet
+    mock_influx_client.query.return_value = ResultSet({})
+    mock_influx_client.write.return_value = True
+
+    asyncio.run(server.list_measurements(target="telegraf"))
+    asyncio.run(server.write_point(server.WritePointRequest(target="telegraf/autogen", measurement="new", fields={"value": 1})))
+    asyncio.run(server.list_measurements(target="telegraf"))
+    assert mock_influx_client.query.call_count == 2
+
+    asyncio.run(server.list_measurements(target="telegraf/autogen")) # Same database, still cached
+    assert mock_influx_client.query.call_count == 2
+
+
+def test_write_points_v1_batches_per_target(mock_influx_client):
+    """write_points should issue one v1 write per database/retention policy."""
+    mock_influx_client.version = "1"
+    mock_influx_client.write.return_value = True
+    requests = [
+        server.WritePointRequest(target="iot-db", measurement="temp", fields={"value": 1.0}),
+        server.WritePointRequest(target="iot-db/autogen", measurement="temp", fields={"value": 2.0}),
+        server.WritePointRequest(target="iot-db", measurement="temp", fields={"value": 3.0}, tags={"site": "a"}),
+    ]
+
+    response = asyncio.run(server.write_points(requests))
+
+    assert (response.ok, response.written) == (True, 3)
+    assert mock_influx_client.write.call_count == 2
+    first_points = mock_influx_client.write.call_args_list[0][0][0]
+    assert [p["fields"]["value"] for p in first_points] == [1.0, 3.0]
+    assert mock_influx_client.write.call_args_list[0][1] == {"database": "iot-db", "retention_policy": None}
+    assert mock_influx_client.write.call_args_list[1][1] == {"database": "iot-db", "retention_policy": "autogen"}
+
+
+def test_write_points_v2_batches_per_bucket(mock_influx_client):
+    """write_points should issue one v2 write per bucket and surface a failed write as an error."""
+    mock_influx_client.version = "2"
+    mock_influx_client.write.side_effect = [True, ConnectionError("refused")]
+    requests = [
+        server.WritePointRequest(target="iot-bucket", measurement="temp", fields={"value": 1.0}),
+        server.WritePointRequest(target="iot-bucket", measurement="temp", fields={"value": 2.0}),
+        server.WritePointRequest(target="other-bucket", measurement="temp", fields={"value": 3.0}),
+    ]
+
+    with pytest.raises(ToolError, match="refused"):
+        asyncio.run(server.write_points(requests))
+
+    first_call = mock_influx_client.write.call_args_list[0][1]
+    assert first_call["bucket"] == "iot-bucket"
+    assert [p["fields"]["value"] for p in first_call["record"]] == [1.0, 2.0]
+    assert mock_influx_client.write.call_args_list[1][1]["bucket"] == "other-bucket"
+
+
 def test_query_timeseries_smoke(mock_influx_client):
     """Smoke test for the query_timeseries tool."""
     # Arrange
@@ -56,17 +162,17 @@ def test_query_timeseries_smoke(mock_influx_client):
     # just the function in 'queries.py' that the tool calls.
 
     # A better approach is to mock the client call inside the query function
-    mock_influx_client.query.return_value = [] # Return empty result for simplicity
+    mock_influx_client.query_csv.return_value = [] # Return empty result for simplicity
 
     # Act
-    response = server.query_timeseries(request_model)
+    response = asyncio.run(server.query_timeseries(request_model))
 
     # Assert
     # We expect the tool to call the query function, which in turn calls the client
-    mock_influx_client.query.assert_called_once()
+    mock_influx_client.query_csv.assert_called_once()
 
     # Check if the generated query string contains expected parts
-    called_query_arg = mock_influx_client.query.call_args[0][0]
+    called_query_arg = mock_influx_client.query_csv.call_args[0][0]
     assert 'from(bucket: "iot-bucket")' in called_query_arg
     assert 'r["_measurement"] == "temp"' in called_query_arg
     assert 'r["device"] == "abc"' in called_query_arg
@@ -76,6 +182,108 @@ def test_query_timeseries_smoke(mock_influx_client):
     assert response.stats.points_returned == 0
 
 
+def test_query_timeseries_v2_parses_annotated_csv(mock_influx_client):
+    """v2 results are read from annotated CSV, keeping server timestamps as-is."""
+    mock_influx_client.query_csv.return_value = iter([
+        ["#datatype", "string", "long", "dateTime:RFC3339", "double"],
+        ["#group", "false", "false", "false", "false"],
+        ["#default", "results", "", "", ""],
+        ["", "result", "table", "_time", "_value"],
+        ["", "", "0", "2023-01-01T00:00:00Z", "21.5"],
+        ["", "", "0", "2023-01-01T00:05:00Z", ""],
+    ])
+    request_model = QueryTimeseriesRequest(
+        target="iot-bucket", measurement="temp", field="value", start="-1h",
+    )
+
+    response = asyncio.run(server.query_timeseries(request_model))
+
+    assert [(p.time_iso, p.value) for p in response.series] == [
+        ("2023-01-01T00:00:00Z", 21.5),
+        ("2023-01-01T00:05:00Z", None),
+    ]
+
+
+def test_query_timeseries_v2_return_columns(mock_influx_client):
+    """Columnar v2 results should concatenate every frame, map NaN to None and keep series timestamps."""
+    pd = pytest.importorskip("pandas")
+    mock_influx_client.query_data_frame.return_value = [
+        pd.DataFrame({"_time": pd.to_datetime(["2023-01-01T00:00:00Z", "2023-01-01T00:01:00.5Z"], format="ISO8601"), "_value": [21.5, float("nan")]}),
+        pd.DataFrame({"_time": pd.to_datetime(["2023-01-01T00:02:00.000000001Z"]), "_value": [22.0]}),
+    ]
+    mock_influx_client.query_csv.return_value = iter([
+        ["", "result", "table", "_time", "_value"],
+        ["", "", "0", "2023-01-01T00:00:00Z", "21.5"],
+        ["", "", "0", "2023-01-01T00:01:00.5Z", ""],
+        ["", "", "0", "2023-01-01T00:02:00.000000001Z", "22.0"],
+    ])
+    request = dict(target="iot-bucket", measurement="temp", field="value", start="-1h")
+
+    columns = asyncio.run(server.query_timeseries(QueryTimeseriesRequest(**request, return_columns=True)))
+    series = asyncio.run(server.query_timeseries(QueryTimeseriesRequest(**request)))
+
+    assert columns.series == [] and columns.stats.points_returned == 3
+    assert columns.columns.value == [21.5, None, 22.0]
+    assert columns.columns.time_iso == [p.time_iso for p in series.series]
+
+
+def test_query_timeseries_v2_return_columns_requires_pandas(mock_influx_client, monkeypatch):
+    """Without pandas, a columnar v2 request should fail with a clear error."""
+    monkeypatch.setitem(sys.modules, "pandas", None)
+    request_model = QueryTimeseriesRequest(
+        target="iot-bucket", measurement="temp", field="value", start="-1h", return_columns=True,
+    )
+
+    with pytest.raises(ToolError, match="requires pandas"):
+        asyncio.run(server.query_timeseries(request_model))
+    mock_influx_client.query_data_frame.assert_not_called()
+
+
+@pytest.mark.parametrize("aggregate, every, value_key", [
+    (None, None, "value"),
+    ("mean", "5m", "mean"),
+])
+def test_query_timeseries_v1_return_columns(mock_influx_client, aggregate, every, value_key):
+    """Columnar v1 results should read the aggregate column when downsampling, else the field."""
+    mock_influx_client.version = "1"
+    from influxdb.resultset import ResultSet
+    mock_influx_client.query.return_value = ResultSet({
+        'series': [{
+            'name': 'temp',
+            'columns': ['time', value_key],
+            'values': [['2023-01-01T00:00:00Z', 21.5], ['2023-01-01T00:05:00Z', None]]
+        }]
+    })
+    request_model = QueryTimeseriesRequest(
+        target="iot-db", measurement="temp", field="value", start="-1h",
+        aggregate=aggregate, every=every, return_columns=True,
+    )
+
+    response = asyncio.run(server.query_timeseries(request_model))
+
+    assert response.series == [] and response.stats.points_returned == 2
+    assert response.columns.time_iso == ["2023-01-01T00:00:00Z", "2023-01-01T00:05:00Z"]
+    assert response.columns.value == [21.5, None]
+
+
+def test_query_timeseries_escapes_flux_literals(mock_influx_client):
+    """User-supplied names are emitted as escaped Flux string literals."""
+    mock_influx_client.query_csv.return_value = []
+    request_model = QueryTimeseriesRequest(
+        target='iot"bucket',
+        measurement="temp",
+        field="value",
+        start="2023-01-01T00:00:00Z",
+        stop="2023-01-02T00:00:00Z",
+    )
+
+    asyncio.run(server.query_timeseries(request_model))
+
+    called_query_arg = mock_influx_client.query_csv.call_args[0][0]
+    assert 'from(bucket: "iot\\"bucket")' in called_query_arg
+    assert 'range(start: 2023-01-01T00:00:00.000000Z, stop: 2023-01-02T00:00:00.000000Z)' in called_query_arg
+
+
 def test_last_point_v1_smoke(mock_influx_client):
     """Smoke test for last_point, simulating a v1 client."""
     # Arrange
@@ -100,7 +308,7 @@ def test_last_point_v1_smoke(mock_influx_client):
     )
 
     # Act
-    response = server.last_point(request)
+    response = asyncio.run(server.last_point(request))
 
     # Assert
     mock_influx_client.query.assert_called_once()
@@ -111,3 +319,197 @@ def test_last_point_v1_smoke(mock_influx_client):
 
     assert response.value == 99
     assert response.field == "battery"
+
+
+def test_last_point_v2_time_matches_query_timeseries(mock_influx_client):
+    """v2 last_point should format its timestamp like query_timeseries does."""
+    from datetime import datetime, timezone
+    from influxdb_client.client.flux_table import FluxRecord, FluxTable
+    table = FluxTable()
+    table.records.append(FluxRecord(0, {
+        "result": "_result", "table": 0, "_measurement": "temp", "_field": "value",
+        "_time": datetime(2023, 1, 1, 0, 1, 0, 500000, tzinfo=timezone.utc), "_value": 22.0, "device_id": "abc-123",
+    }))
+    mock_influx_client.query.return_value = [table]
+    mock_influx_client.query_csv.return_value = iter([
+        ["", "result", "table", "_time", "_value"],
+        ["", "", "0", "2023-01-01T00:01:00.5Z", "22.0"],
+    ])
+
+    last = asyncio.run(server.last_point(server.LastPointRequest(target="iot-bucket", measurement="temp", field="value")))
+    series = asyncio.run(server.query_timeseries(
+        QueryTimeseriesRequest(target="iot-bucket", measurement="temp", field="value", start="-1h")
+    ))
+
+    assert last.time_iso == series.series[-1].time_iso == "2023-01-01T00:01:00.5Z"
+    assert last.tags == {"device_id": "abc-123"}
+
+
+def test_list_tags_v1_smoke(mock_influx_client):
+    """Smoke test for list_tags, simulating a v1 client with several tag keys."""
+    # Arrange
+    mock_influx_client.version = "1"
+
+    from influxdb.resultset import ResultSet
+
+    def fake_query(query, db=None):
+        if query.startswith("SHOW TAG KEYS"):
+            return ResultSet({'series': [{
+                'name': 'device_status',
+                'columns': ['tagKey'],
+                'values': [['device_id'], ['site']]
+            }]})
+        key = query.rsplit('"', 2)[1]
+        return ResultSet({'series': [{
+            'name': 'device_status',
+            'columns': ['key', 'value'],
+            'values': [[key, f'{key}-1'], [key, f'{key}-2']]
+        }]})
+
+    mock_influx_client.query.side_effect = fake_query
+
+    # Act
+    response = asyncio.run(server.list_tags(target="iot-db", measurement="device_status"))
+
+    # Assert
+    assert mock_influx_client.query.call_count == 3
+    assert [t.key for t in response.tags] == ["device_id", "site"]
+    assert response.tags[1].values == ["site-1", "site-2"]
+
+
+def test_list_tags_v2_single_query(mock_influx_client):
+    """list_tags on v2 should fetch every tag key and value in one Flux query."""
+    # Arrange
+    from influxdb_client.client.flux_table import FluxRecord, FluxTable
+
+    table = FluxTable()
+    table.records = [
+        FluxRecord(0, {"result": "_result", "table": 0, "_measurement": "temp", "_field": "value", "device": "b"}),
+        FluxRecord(0, {"result": "_result", "table": 0, "_measurement": "temp", "_field": "value", "device": "a"}),
+    ]
+    mock_influx_client.query.return_value = [table]
+
+    # Act
+    response = asyncio.run(server.list_tags(target="iot-bucket", measurement="temp"))
+
+    # Assert
+    mock_influx_client.query.assert_called_once()
+    tags = {t.key: t.values for t in response.tags}
+    assert tags == {"device": ["a", "b"]}
+    assert "_field" not in tags and "_measurement" not in tags
+
+
+def test_query_timeseries_v1_escapes_tag_values(mock_influx_client):
+    """Tag values are emitted as escaped InfluxQL string literals."""
+    mock_influx_client.version = "1"
+    request_model = QueryTimeseriesRequest(
+        target="iot-db/autogen",
+        measurement="temp",
+        field="value",
+        start="2023-01-01T00:00:00Z",
+        stop="2023-01-02T00:00:00Z",
+        tags={"site": "o'hare"},
+    )
+
+    asyncio.run(server.query_timeseries(request_model))
+
+    called_query_arg = mock_influx_client.query.call_args[0][0]
+    assert 'FROM "iot-db"."autogen"."temp"' in called_query_arg
+    assert "time >= '2023-01-01T00:00:00.000000Z'" in called_query_arg
+    assert "\"site\" = 'o\\'hare'" in called_query_arg
+
+
+def test_window_stats_v2_single_query(mock_influx_client):
+    """window_stats on v2 should compute every aggregate in one Flux query."""
+    from influxdb_client.client.flux_table import FluxRecord, FluxTable
+
+    tables = []
+    for name, value in [("mean", 21.5), ("min", 18.0), ("max", 25.0), ("last", 22.0), ("count", 12)]:
+        table = FluxTable()
+        table.records = [FluxRecord(0, {"result": name, "table": 0, "_value": value})]
+        tables.append(table)
+    mock_influx_client.query.return_value = tables
+
+    request = server.WindowStatsRequest(target="iot-bucket", measurement="temp", field="value", window="-24h")
+    response = asyncio.run(server.window_stats(request))
+
+    mock_influx_client.query.assert_called_once()
+    called_query_arg = mock_influx_client.query.call_args[0][0]
+    assert 'yield(name: "mean")' in called_query_arg
+    assert 'yield(name: "count")' in called_query_arg
+    assert (response.mean, response.min, response.max, response.last, response.count) == (21.5, 18.0, 25.0, 22.0, 12)
+
+
+def test_window_stats_v1_single_query(mock_influx_client):
+    """window_stats on v1 should issue a single multi-aggregate InfluxQL SELECT."""
+    mock_influx_client.version = "1"
+    from influxdb.resultset import ResultSet
+    mock_influx_client.query.return_value = ResultSet({
+        'series': [{
+            'name': 'temp',
+            'columns': ['time', 'mean', 'min', 'max', 'last', 'count'],
+            'values': [['1970-01-01T00:00:00Z', 21.5, 18.0, 25.0, 22.0, 12]]
+        }]
+    })
+
+    request = server.WindowStatsRequest(target="iot-db", measurement="temp", field="value", window="-24h")
+    response = asyncio.run(server.window_stats(request))
+
+    mock_influx_client.query.assert_called_once()
+    called_query_arg = mock_influx_client.query.call_args[0][0]
+    assert called_query_arg.startswith('SELECT MEAN("value") AS "mean", MIN("value") AS "min"')
+    assert (response.mean, response.min, response.max, response.last, response.count) == (21.5, 18.0, 25.0, 22.0, 12)
+
+
+def test_window_stats_v1_empty_window(mock_influx_client):
+    """An empty v1 window should report no aggregates and a zero count."""
+    mock_influx_client.version = "1"
+    from influxdb.resultset import ResultSet
+    mock_influx_client.query.return_value = ResultSet({})
+
+    request = server.WindowStatsRequest(target="iot-db/autogen", measurement="temp", field="value", window="-1h")
+    response = asyncio.run(server.window_stats(request))
+
+    called_query_arg = mock_influx_client.query.call_args[0][0]
+    assert 'COUNT("value") AS "count" FROM "iot-db"."autogen"."temp"' in called_query_arg
+    assert (response.mean, response.last, response.count) == (None, None, 0)
+
+
+def test_resource_json_footer_is_opt_in(mocker, monkeypatch):
+    """The resource should only append the full JSON dump when include_json is set."""
+    response = server.QueryTimeseriesResponse(
+        series=[server.queries.TimeseriesPoint(time_iso=f"2023-01-01T00:00:{i:02d}Z", value=i) for i in range(25)],
+        stats=server.queries.QueryStats(
+            points_returned=25,
+            start_effective_iso="2023-01-01T00:00:00+00:00",
+            stop_effective_iso="2023-01-01T00:01:00+00:00",
+        ),
+    )
+    query_mock = mocker.AsyncMock(return_value=response)
+    monkeypatch.setattr(server, "query_timeseries", query_mock)
+    context = mocker.MagicMock()
+
+    context.request_context.request.url.query = "field=temp&device_id=abc"
+    text = asyncio.run(server.read_influxdb_resource("bucket", "meas", context))
+    assert "... (truncated, 5 more points)" in text
+    assert "Full JSON Response" not in text
+    assert query_mock.call_args[0][0].tags == {"device_id": "abc"}
+
+    context.request_context.request.url.query = "field=temp&include_json=true"
+    text = asyncio.run(server.read_influxdb_resource("bucket", "meas", context))
+    assert "Full JSON Response" in text
+    assert '\n  "series": [' in text
+    assert query_mock.call_args[0][0].tags is None
+
+    context.request_context.request.url.query = "field=temp&include_json=compact"
+    text = asyncio.run(server.read_influxdb_resource("bucket", "meas", context))
+    assert text.endswith(response.model_dump_json())
+
+
+def test_async_tool_maps_errors_to_tool_error(mock_influx_client):
+    """Errors raised on the worker thread should surface as ToolError."""
+    mock_influx_client.query_csv.side_effect = ConnectionError("refused")
+    request_model = QueryTimeseriesRequest(target="iot-bucket", measurement="temp", field="value", start="-1h")
+
+    with pytest.raises(ToolError, match="Connection to InfluxDB failed: refused"):
+        asyncio.run(server.query_timeseries(request_model))